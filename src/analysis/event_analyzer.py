@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import List, Optional
+import numpy as np
 import pandas as pd
 from src.models.price_event import Event, PriceEventCorrelation
 from src.database.db_manager import DatabaseManager
@@ -8,6 +10,31 @@ from src.models.database import PriceChange
 from loguru import logger
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
+# Множители влияния для отдельных типов событий (остальные типы - 1.0)
+EVENT_TYPE_FACTORS = {
+    'ETF': 1.5,
+    'REGULATION': 1.2
+}
+
+
+def _check_top_k(top_k: Optional[int]) -> None:
+    """Проверка количества отбираемых событий: отрицательное значение не имеет смысла"""
+    if top_k is not None and top_k < 0:
+        raise ValueError(f"top_k должен быть неотрицательным, получено: {top_k}")
+
+
+@lru_cache(maxsize=None)
+def _get_sentiment_analyzer() -> SentimentIntensityAnalyzer:
+    """Создание анализатора тональности один раз на процесс (загрузка словаря VADER дорогая)"""
+    return SentimentIntensityAnalyzer()
+
+
+@lru_cache(maxsize=100_000)
+def _vader_compound(text: str) -> float:
+    """Итоговая оценка тональности текста; одинаковые заголовки из пересекающихся окон не пересчитываются"""
+    return _get_sentiment_analyzer().polarity_scores(text)['compound']
+
+
 class EventAnalyzer:
     """Класс для анализа причин изменения цены биткоина"""
     
@@ -57,51 +84,159 @@ class EventAnalyzer:
     
     def analyze_sentiments(self, events: List[Event]) -> List[Event]:
         """Анализирует тональность для каждого события, если не задана."""
-        analyzer = SentimentIntensityAnalyzer()
         result = []
         for event in events:
             if event.sentiment_score is None:
-                sentiment_score = analyzer.polarity_scores(event.description)['compound']
+                # События из БД приходят ORM-объектами, поэтому собираем модель заново
                 event = Event(
                     timestamp=event.timestamp,
                     event_type=event.event_type,
                     source=event.source,
                     description=event.description,
-                    sentiment_score=sentiment_score
+                    sentiment_score=_vader_compound(event.description)
                 )
             result.append(event)
         return result
 
-    def analyze_influences(self, events: List[Event]) -> List[PriceEventCorrelation]:
-        """Рассчитывает влияние каждого события на изменение цены."""
-        causes = []
-        for event in events:
-            # 1. Временная близость
-            time_diff = abs((self.price_change.timestamp - event.timestamp).total_seconds() / 3600)
-            time_factor = 1.0 / (1.0 + time_diff)
-            # 2. Соответствие настроения и направления изменения цены
-            sentiment_factor = 1.0
-            if event.sentiment_score is not None:
-                if (self.price_change.percentage_change > 0 and event.sentiment_score > 0) or \
-                   (self.price_change.percentage_change < 0 and event.sentiment_score < 0):
-                    sentiment_factor = abs(event.sentiment_score)
-                else:
-                    sentiment_factor = 0.5
-            # 3. Тип события
-            event_type_factor = 1.0
-            if event.event_type == 'ETF':
-                event_type_factor = 1.5
-            elif event.event_type == 'REGULATION':
-                event_type_factor = 1.2
-            # Итоговая оценка влияния
-            impact_score = min(1.0, time_factor * sentiment_factor * event_type_factor)
-            cause = PriceEventCorrelation(
-                event=event,
-                impact_score=impact_score
+    def analyze_influences(self, events: List[Event], top_k: Optional[int] = None) -> List[PriceEventCorrelation]:
+        """
+        Рассчитывает влияние каждого события на изменение цены (векторно по всем событиям).
+
+        Args:
+            events: События для оценки
+            top_k: Количество наиболее влиятельных событий в результате. Если None,
+                   возвращаются все события
+
+        Returns:
+            Список корреляций, отсортированный по убыванию влияния
+            
+        Raises:
+            ValueError: Если top_k отрицательный
+        """
+        _check_top_k(top_k)
+        if not events:
+            return []
+        impact_scores = self._compute_impact_scores(
+            timestamps=np.array([event.timestamp for event in events], dtype='datetime64[us]'),
+            sentiments=np.array(
+                [np.nan if event.sentiment_score is None else event.sentiment_score for event in events],
+                dtype=np.float64
+            ),
+            event_types=[event.event_type for event in events]
+        )
+        return [
+            PriceEventCorrelation(event=events[i], impact_score=float(impact_scores[i]))
+            for i in self._rank_by_impact(impact_scores, top_k)
+        ]
+
+    def analyze_causes_fused(self, window_hours: Optional[int] = None,
+                             top_k: Optional[int] = None) -> List[PriceEventCorrelation]:
+        """
+        Поиск событий, анализ тональности и влияния за один проход по столбцам событий.
+        
+        В отличие от последовательного вызова find_relevant_events, analyze_sentiments и
+        analyze_influences, промежуточные списки событий не создаются: Event строится только
+        для событий, попавших в результат.
+        
+        Args:
+            window_hours: Временное окно в часах для поиска событий. Если None, 
+                         анализируются все события из базы данных
+            top_k: Количество наиболее влиятельных событий в результате. Если None,
+                   возвращаются все события
+                   
+        Returns:
+            Список корреляций, отсортированный по убыванию влияния
+            
+        Raises:
+            ValueError: Если top_k отрицательный
+        """
+        _check_top_k(top_k)
+        # 1. Получение событий из БД по столбцам
+        if window_hours is None:
+            columns = self.db_manager.get_event_columns()
+        else:
+            columns = self.db_manager.get_event_columns(
+                start_time=self.price_change.timestamp - timedelta(hours=window_hours),
+                end_time=self.price_change.timestamp
             )
-            causes.append(cause)
-        causes.sort(key=lambda x: x.impact_score, reverse=True)
-        return causes
+        descriptions = columns['description']
+        if not descriptions:
+            return []
+        logger.info(f"Найдено {len(descriptions)} релевантных событий")
+
+        # 2. Тональность считается только для событий, где она не задана
+        sentiments = np.array(
+            [np.nan if score is None else score for score in columns['sentiment_score']],
+            dtype=np.float64
+        )
+        for i in np.flatnonzero(np.isnan(sentiments)):
+            sentiments[i] = _vader_compound(descriptions[i])
+
+        # 3. Оценка влияния и отбор наиболее влиятельных
+        impact_scores = self._compute_impact_scores(
+            timestamps=np.array(columns['timestamp'], dtype='datetime64[us]'),
+            sentiments=sentiments,
+            event_types=columns['event_type']
+        )
+        return [
+            PriceEventCorrelation(
+                event=Event(
+                    timestamp=columns['timestamp'][i],
+                    event_type=columns['event_type'][i],
+                    source=columns['source'][i],
+                    description=descriptions[i],
+                    sentiment_score=float(sentiments[i])
+                ),
+                impact_score=float(impact_scores[i])
+            )
+            for i in self._rank_by_impact(impact_scores, top_k)
+        ]
+
+    def _compute_impact_scores(self, timestamps: np.ndarray, sentiments: np.ndarray,
+                               event_types: List[str]) -> np.ndarray:
+        """
+        Векторный расчет оценки влияния событий на изменение цены
+        
+        Args:
+            timestamps: Время событий (datetime64)
+            sentiments: Тональность событий (NaN, если не задана)
+            event_types: Типы событий
+            
+        Returns:
+            np.ndarray: Оценки влияния в диапазоне [0, 1]
+        """
+        # Знак изменения цены вычисляется один раз; направление сравнивается как int8-знаки
+        price_sign = np.int8(np.sign(self.price_change.percentage_change))
+        sentiment_signs = np.sign(np.nan_to_num(sentiments)).astype(np.int8)
+
+        # Все множители накапливаются в одном буфере in-place, без промежуточных массивов
+        # 1. Временная близость
+        impact_scores = (timestamps - np.datetime64(self.price_change.timestamp, 'us')) / np.timedelta64(1, 'h')
+        np.abs(impact_scores, out=impact_scores)
+        impact_scores += 1.0
+        np.reciprocal(impact_scores, out=impact_scores)
+        # 2. Соответствие настроения и направления изменения цены
+        same_direction = (sentiment_signs == price_sign) & (sentiment_signs != 0)
+        sentiment_factor = np.full_like(sentiments, 0.5)
+        np.abs(sentiments, out=sentiment_factor, where=same_direction)
+        sentiment_factor[np.isnan(sentiments)] = 1.0
+        impact_scores *= sentiment_factor
+        # 3. Тип события: одна маска сравнения на каждый тип с множителем
+        event_types = np.asarray(event_types)
+        for event_type, factor in EVENT_TYPE_FACTORS.items():
+            impact_scores[event_types == event_type] *= factor
+        # Итоговая оценка влияния
+        np.minimum(impact_scores, 1.0, out=impact_scores)
+        return impact_scores
+
+    @staticmethod
+    def _rank_by_impact(impact_scores: np.ndarray, top_k: Optional[int] = None) -> np.ndarray:
+        """Индексы событий по убыванию влияния (только top_k первых, если задано)"""
+        if top_k is not None and top_k < len(impact_scores):
+            # Частичный отбор O(N), полная сортировка только для top_k победителей
+            order = np.argpartition(-impact_scores, top_k)[:top_k]
+            return order[np.argsort(-impact_scores[order], kind='stable')]
+        return np.argsort(-impact_scores, kind='stable')
 
     def save_analysis_results(self, price_change: PriceChange, correlations: List[PriceEventCorrelation]) -> None:
         """Сохраняет результаты анализа в базу данных."""
@@ -110,32 +245,32 @@ class EventAnalyzer:
         except Exception as e:
             logger.error(f"Ошибка при сохранении результатов анализа: {str(e)}")
 
-    def analyze_causes(self, window_hours: Optional[int] = None) -> None:
+    def analyze_causes(self, window_hours: Optional[int] = None, top_k: Optional[int] = None) -> None:
         """
         Полный анализ: поиск релевантных событий, анализ тональности и влияния, сохранение и вывод результатов.
         
         Args:
             window_hours: Временное окно в часах для поиска событий. Если None, 
                          анализируются все события из базы данных
+            top_k: Количество наиболее влиятельных причин для сохранения и вывода. Если None,
+                   сохраняются все причины
+                   
+        Raises:
+            ValueError: Если top_k отрицательный
         """
-        # 1. Поиск релевантных событий
-        events = self.find_relevant_events(window_hours=window_hours)
-        if not events:
+        #TODO улучшить рассчет влияния событий на изменение цены
+        # 1. Поиск релевантных событий, анализ тональности и влияния за один проход
+        correlations = self.analyze_causes_fused(window_hours=window_hours, top_k=top_k)
+        if not correlations:
             logger.info("Релевантные события не найдены.")
             return
-        #TODO улучшить рассчет влияния событий на изменение цены
-        # 2. Анализ тональности
-        events_with_sentiment = self.analyze_sentiments(events)
-        
-        # 3. Анализ влияния
-        correlations = self.analyze_influences(events_with_sentiment)
         
-        # 4. Сохранение результатов
+        # 2. Сохранение результатов
         self.save_analysis_results(self.price_change, correlations)
         
-        # 5. Вывод результатов
+        # 3. Вывод результатов
         logger.info(f"\nАнализ причин изменения цены биткоина {self.price_change.timestamp.strftime('%Y-%m-%d %H:%M')}")
         logger.info(f"Изменение цены: {self.price_change.percentage_change:+.1f}%")
         logger.info("\nВозможные причины (отсортированы по влиянию):")
         for cause in correlations:
-            cause.log_details() 
\ No newline at end of file
+            cause.log_details()
\ No newline at end of file
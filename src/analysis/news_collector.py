@@ -1,14 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Dict, Optional
+from pathlib import Path
+from queue import Queue
+from threading import Thread
+from typing import List, Dict, Optional, Tuple
 from loguru import logger
 from dataclasses import dataclass
 import cryptocompare
 import requests
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
+import orjson
 import pandas as pd
 
 from ..models.price_event import Event
 from ..database.db_manager import DatabaseManager
 
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+CRYPTOCOMPARE_NEWS_URL = "https://min-api.cryptocompare.com/data/v2/news/"
+# Размер пачки событий для записи в БД (один INSERT и один коммит на пачку)
+# и максимальное число пачек в очереди записи
+SAVE_BATCH_SIZE = 1000
+SAVE_QUEUE_SIZE = 8
+# Максимальное число источников, опрашиваемых одновременно
+MAX_FETCH_WORKERS = 8
+# Таймауты HTTP-запросов (подключение, чтение) в секундах
+HTTP_TIMEOUT = (3.05, 10)
+# Настройки HTTP-кэша по умолчанию: файл SQLite относительно корня проекта и время жизни ответа в секундах
+HTTP_CACHE_PATH = "data/http_cache.sqlite"
+HTTP_CACHE_EXPIRE_AFTER = 3600
+
 # Константы для типов событий
 EVENT_TYPES = {
     'NEWS': 'news',
@@ -17,7 +40,23 @@ EVENT_TYPES = {
     'TECHNICAL': 'technical'
 }
 
-@dataclass
+def _published_on(item) -> int:
+    """Время публикации новости (unix time) или -1, если поле отсутствует или некорректно"""
+    published_on = item.get('published_on') if isinstance(item, dict) else None
+    if isinstance(published_on, int) and not isinstance(published_on, bool):
+        return published_on
+    return -1
+
+def _item_key(item):
+    """Ключ новости для отсева повторов между страницами: id, а без него время и заголовок"""
+    if not isinstance(item, dict):
+        return None
+    item_id = item.get('id')
+    if item_id is not None:
+        return str(item_id)
+    return (_published_on(item), str(item.get('title')))
+
+@dataclass(slots=True, frozen=True)
 class NewsSource:
     """Конфигурация источника новостей"""
     name: str
@@ -39,6 +78,7 @@ class NewsCollector:
         self.db_manager = db_manager
         self.sources: List[NewsSource] = []
         self._init_sources()
+        self._http = self._create_http_session()
         
     def _init_sources(self) -> None:
         """Инициализация источников новостей из конфигурации"""
@@ -56,6 +96,35 @@ class NewsCollector:
         
         logger.info(f"Initialized {len(self.sources)} news sources")
     
+    def _create_http_session(self) -> requests.Session:
+        """
+        Создание HTTP-сессии сборщика
+        
+        Сессия переиспользует соединения (keep-alive, без повторного TLS-рукопожатия)
+        и повторяет запросы при временных ошибках сервера. Если в конфигурации включен
+        http_cache, успешные ответы сохраняются на диск и повторный запуск за тот же
+        период не обращается к API, пока ответ не устарел.
+        """
+        cache_config = self.config.get('news_collector', {}).get('http_cache', {})
+        if cache_config.get('enabled', False):
+            cache_path = PROJECT_ROOT / cache_config.get('path', HTTP_CACHE_PATH)
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            session = requests_cache.CachedSession(
+                str(cache_path),
+                backend='sqlite',
+                expire_after=cache_config.get('expire_after', HTTP_CACHE_EXPIRE_AFTER),
+                allowable_codes=(200,)
+            )
+        else:
+            session = requests.Session()
+        session.mount('https://', HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        ))
+        session.headers.update({'Accept': 'application/json'})
+        return session
+    
     def collect_news(self, start_date: datetime, end_date: datetime) -> None:
         """
         Сбор новостей за указанный период и сохранение их в базу данных
@@ -65,31 +134,60 @@ class NewsCollector:
             end_date: Конечная дата периода
         """
         logger.info(f"Начало сбора новостей за период {start_date} - {end_date}")
-        total_events = 0
         
-        for source in self.sources:
-            try:
-                logger.debug(f"Сбор новостей из источника {source.name}")
-                source_events = self._collect_from_source(source, start_date, end_date)
-                
-                # Сохраняем каждое событие в базу данных
-                for event in source_events:
+        # Запись в БД идет в отдельном потоке, пока источники продолжают загружаться.
+        # Поток записи ровно один: SQLite допускает только одного писателя
+        save_queue: Queue = Queue(maxsize=SAVE_QUEUE_SIZE)
+        saved_counts: List[int] = []
+        writer = Thread(target=self._save_events_worker, args=(save_queue, saved_counts), daemon=True)
+        writer.start()
+        
+        try:
+            # Источники опрашиваются параллельно: сбор ограничен сетевыми задержками, а не CPU.
+            # Число одновременных запросов ограничено, чтобы не упираться в лимиты API и пул соединений
+            max_workers = self.config.get('news_collector', {}).get('max_workers', MAX_FETCH_WORKERS)
+            with ThreadPoolExecutor(max_workers=max(1, min(len(self.sources), max_workers))) as executor:
+                futures = {
+                    executor.submit(self._collect_from_source, source, start_date, end_date): source
+                    for source in self.sources
+                }
+                for future in as_completed(futures):
+                    source = futures[future]
                     try:
-                        self.db_manager.save_event(event)
-                        total_events += 1
+                        source_events = future.result()
+                        logger.info(f"Собрано {len(source_events)} новостей из {source.name}")
+                        for i in range(0, len(source_events), SAVE_BATCH_SIZE):
+                            save_queue.put(source_events[i:i + SAVE_BATCH_SIZE])
                     except Exception as e:
-                        logger.error(f"Ошибка при сохранении события в БД: {str(e)}")
-                        continue
-                        
-                logger.info(f"Собрано и сохранено {len(source_events)} новостей из {source.name}")
-            except Exception as e:
-                logger.error(f"Ошибка при сборе новостей из {source.name}: {str(e)}")
+                        logger.error(f"Ошибка при сборе новостей из {source.name}: {str(e)}")
+        finally:
+            save_queue.put(None)
+            writer.join()
+        
+        total_events = sum(saved_counts)
         
         if total_events == 0:
             logger.warning(f"Не удалось собрать новости за период {start_date} - {end_date}")
         else:
             logger.info(f"Всего собрано и сохранено {total_events} новостей из всех источников")
     
+    def _save_events_worker(self, save_queue: Queue, saved_counts: List[int]) -> None:
+        """
+        Поток записи: сохраняет пачки событий из очереди, пока не получит None
+        
+        Args:
+            save_queue: Очередь пачек событий
+            saved_counts: Список, в который добавляется число сохраненных событий каждой пачки
+        """
+        while True:
+            batch = save_queue.get()
+            if batch is None:
+                break
+            try:
+                saved_counts.append(self.db_manager.save_events_bulk(batch))
+            except Exception as e:
+                logger.error(f"Ошибка при сохранении новостей в БД: {str(e)}")
+    
     def _collect_from_source(self, source: NewsSource, 
                            start_date: datetime, 
                            end_date: datetime) -> List[Event]:
@@ -112,55 +210,119 @@ class NewsCollector:
                                   start_date: datetime,
                                   end_date: datetime) -> List[Event]:
         """
-        Сбор новостей из CryptoCompare только с первой страницы (без пагинации)
+        Сбор новостей из CryptoCompare за указанный период
+        
+        Лента запрашивается страницами от end_date в прошлое (параметр lTs),
+        пока не будут получены новости старше start_date. Следующая страница начинается
+        с времени самой старой новости (не на секунду раньше), чтобы не потерять новости,
+        опубликованные в ту же секунду; повторы отсеиваются по ключу новости.
         """
-        #TODO реализовать сбор всех новостей за указанный период
+        # Проверяем валидность дат
+        if end_date < start_date:
+            logger.error(f"Invalid date range: end_date {end_date} is before start_date {start_date}")
+            return []
+
+        events = []
+        start_ts = int(start_date.timestamp())
+        end_ts = int(end_date.timestamp())
+        cursor = end_ts
+        seen_keys = set()
+        page_size = 0
+
+        # При ошибке на очередной странице возвращаются новости, собранные до нее
         try:
-            # Проверяем валидность дат
-            if end_date < start_date:
-                logger.error(f"Invalid date range: end_date {end_date} is before start_date {start_date}")
-                return []
-
-            events = []
-            url = f"https://min-api.cryptocompare.com/data/v2/news/?lang=EN&page=0"
-            response = requests.get(url)
-            response.raise_for_status()
-            news_data = response.json()
-
-            if not isinstance(news_data, dict):
-                raise Exception(f"Invalid response format: {type(news_data)}")
-
-            if 'Data' not in news_data:
-                raise Exception(f"Missing 'Data' field in response: {news_data}")
-
-            for item in news_data['Data']:
-                try:
-                    news_time = datetime.fromtimestamp(item['published_on'])
-                    if start_date <= news_time <= end_date:
-                        event = Event(
-                            timestamp=news_time,
-                            event_type=EVENT_TYPES['NEWS'],
-                            source='cryptocompare',
-                            description=item['title'],
-                            sentiment_score=None
+            while True:
+                response = self._http.get(
+                    CRYPTOCOMPARE_NEWS_URL,
+                    params={'lang': 'EN', 'lTs': cursor},
+                    timeout=HTTP_TIMEOUT
+                )
+                response.raise_for_status()
+                news_data = orjson.loads(response.content)
+
+                if not isinstance(news_data, dict):
+                    raise Exception(f"Invalid response format: {type(news_data)}")
+
+                if 'Data' not in news_data:
+                    raise Exception(f"Missing 'Data' field in response: {news_data}")
+
+                data = news_data['Data']
+                new_items = [item for item in data if _item_key(item) not in seen_keys]
+                if new_items:
+                    seen_keys.update(_item_key(item) for item in new_items)
+                    page_events, oldest_ts = self._parse_cryptocompare_page(new_items, start_ts, end_ts)
+                    events.extend(page_events)
+                    next_cursor = oldest_ts
+                else:
+                    # Страница целиком повторилась, и lTs дальше не сдвинется: секунда самой
+                    # старой новости пропускается, чтобы не потерять более старые новости периода.
+                    # Полная страница повторов означает, что в эту секунду опубликовано больше
+                    # новостей, чем помещается на страницу, и часть из них не будет получена
+                    published_on = [ts for ts in map(_published_on, data) if ts >= 0]
+                    if not published_on:
+                        break
+                    oldest_ts = min(published_on)
+                    if len(data) >= page_size:
+                        logger.warning(
+                            f"More than one page of news published at {oldest_ts}, "
+                            f"some news from that second may be skipped"
                         )
-                        events.append(event)
-                        logger.debug(f"Added news: {item['title']} ({news_time})")
-                    else:
-                        logger.debug(f"Skipped news outside period: {item['title']} ({news_time})")
-                except KeyError as e:
-                    logger.warning(f"Missing required field in news item: {e}")
-                    continue
-                except Exception as e:
-                    logger.warning(f"Error processing news item: {e}")
-                    continue
-
-            logger.info(f"Collected {len(events)} news from CryptoCompare for period {start_date} to {end_date}")
-            return events
+                    next_cursor = oldest_ts - 1
+                page_size = max(page_size, len(data))
 
+                # Останавливаемся, когда дошли до начала периода
+                if oldest_ts is None or oldest_ts < start_ts:
+                    break
+                cursor = next_cursor
         except requests.exceptions.RequestException as e:
             logger.error(f"Network error while collecting news from CryptoCompare: {str(e)}")
-            return []
         except Exception as e:
             logger.error(f"Error collecting news from CryptoCompare: {str(e)}")
-            return [] 
\ No newline at end of file
+
+        logger.info(f"Collected {len(events)} news from CryptoCompare for period {start_date} to {end_date}")
+        return events
+
+    def _parse_cryptocompare_page(self, data: List[Dict],
+                                  start_ts: int,
+                                  end_ts: int) -> Tuple[List[Event], Optional[int]]:
+        """
+        Преобразование страницы ленты CryptoCompare в события за период
+        
+        Args:
+            data: Элементы поля 'Data' ответа API
+            start_ts: Начало периода (unix time)
+            end_ts: Конец периода (unix time)
+            
+        Returns:
+            Tuple[List[Event], Optional[int]]: События за период и время самой старой
+            новости на странице (None, если на странице нет новостей со временем)
+        """
+        events = []
+        # Фильтруем по периоду одним векторным сравнением, Event создаем только для подходящих
+        published_on = np.fromiter(
+            (_published_on(item) for item in data), dtype=np.int64, count=len(data)
+        )
+        has_time = published_on >= 0
+        missing = len(data) - int(np.count_nonzero(has_time))
+        if missing:
+            logger.warning(f"Missing or invalid field 'published_on' in {missing} news items")
+        keep = np.flatnonzero((published_on >= start_ts) & (published_on <= end_ts))
+
+        # Время публикации уже сравнивается как целое число; datetime создается только для подходящих
+        for i in keep:
+            title = data[i].get('title')
+            if not title or not isinstance(title, str):
+                continue
+            events.append(Event(
+                timestamp=datetime.fromtimestamp(int(published_on[i])),
+                event_type=EVENT_TYPES['NEWS'],
+                source='cryptocompare',
+                description=title,
+                sentiment_score=None
+            ))
+        if len(events) < len(keep):
+            logger.warning(f"Missing required field 'title' in {len(keep) - len(events)} news items")
+        logger.debug(f"Kept {len(events)}/{len(data)} news items from page")
+
+        oldest_ts = int(published_on[has_time].min()) if missing < len(data) else None
+        return events, oldest_ts
@@ -1,11 +1,16 @@
 from datetime import datetime, timedelta
 import ccxt
 from loguru import logger
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 
 from src.models.database import PriceChange
 from src.database.db_manager import DatabaseManager
 
+DAY_MS = 24 * 60 * 60 * 1000
+# Максимальное число свечей в одном ответе Binance
+OHLCV_MAX_LIMIT = 1000
+
 class PriceAnalyzer:
     def __init__(self, db_manager: DatabaseManager, threshold_percent: float = 5.0):
         """
@@ -57,23 +62,65 @@ class PriceAnalyzer:
             start_date: Начальная дата
             end_date: Конечная дата
         """
-        current_time = start_date
+        # Дневные свечи за весь период (плюс предыдущий день) загружаются одним диапазоном
+        candles = self._fetch_daily_candles(start_date - timedelta(days=1), end_date)
+        if len(candles) < 2:
+            logger.warning(f"Недостаточно данных о цене за период {start_date} - {end_date}")
+            return
         
-        while current_time <= end_date:
-            # Получаем цены для текущего дня и предыдущего
-            current_price = self.get_bitcoin_price(current_time)
-            previous_time = current_time - timedelta(days=1)
-            previous_price = self.get_bitcoin_price(previous_time)
-            
-            if current_price and previous_price:
-                # Рассчитываем процентное изменение
-                price_change_percent = ((current_price - previous_price) / previous_price) * 100
-                
-                # Если изменение превышает пороговое значение, сохраняем в базу
-                if abs(price_change_percent) >= self.threshold_percent:
-                    self._save_price_change(current_time, previous_price, current_price, price_change_percent)
+        # Процентное изменение цены закрытия день к дню считается сразу для всего периода
+        ohlcv = np.asarray(candles, dtype=np.float64)
+        open_times_ms = ohlcv[:, 0].astype(np.int64)
+        closes = ohlcv[:, 4]
+        price_change_percent = (closes[1:] - closes[:-1]) / closes[:-1] * 100
+        significant = np.flatnonzero(np.abs(price_change_percent) >= self.threshold_percent)
+        
+        significant_changes = [
+            self._build_price_change_row(
+                datetime.fromtimestamp(open_times_ms[i + 1] / 1000),
+                float(closes[i]),
+                float(closes[i + 1]),
+                float(price_change_percent[i])
+            )
+            for i in significant
+        ]
+        
+        # Все найденные изменения сохраняются одной транзакцией
+        try:
+            self.db_manager.save_price_changes_bulk(significant_changes)
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении изменений цены: {str(e)}")
+
+    def _fetch_daily_candles(self, start_date: datetime, end_date: datetime) -> List[list]:
+        """
+        Получение дневных свечей BTC/USDT за период минимальным числом запросов
+        
+        Args:
+            start_date: Начальная дата
+            end_date: Конечная дата (включается свеча, покрывающая эту дату)
             
-            current_time += timedelta(days=1)
+        Returns:
+            List[list]: Свечи OHLCV в порядке времени или пустой список в случае ошибки
+        """
+        since_ms = int(start_date.timestamp() * 1000)
+        until_ms = int(end_date.timestamp() * 1000) + DAY_MS
+        candles = []
+        try:
+            while since_ms < until_ms:
+                batch = self.exchange.fetch_ohlcv(
+                    symbol='BTC/USDT',
+                    timeframe='1d',
+                    since=since_ms,
+                    limit=OHLCV_MAX_LIMIT
+                )
+                if not batch:
+                    break
+                candles.extend(candle for candle in batch if candle[0] < until_ms)
+                since_ms = batch[-1][0] + DAY_MS
+            return candles
+        except Exception as e:
+            logger.error(f"Ошибка при получении истории цены биткоина: {str(e)}")
+            return []
 
     def get_last_significant_change(self) -> Optional[PriceChange]:
         """
@@ -83,38 +130,34 @@ class PriceAnalyzer:
             Последнее значительное изменение цены или None, если изменений нет
         """
         try:
-            return self.db_manager.session.query(PriceChange)\
-                .order_by(PriceChange.timestamp.desc())\
-                .first()
+            # Ссылка на последнее изменение обновляется при сохранении, поэтому таблица не сортируется
+            return self.db_manager.get_latest_significant_change()
         except Exception as e:
             logger.error(f"Ошибка при получении последнего изменения цены: {str(e)}")
             return None
 
-    def _save_price_change(self, timestamp: datetime, price_before: float, 
-                          price_after: float, percentage_change: float) -> None:
+    def _build_price_change_row(self, timestamp: datetime, price_before: float, 
+                                price_after: float, percentage_change: float) -> Dict:
         """
-        Сохранение изменения цены в базу данных
+        Создание строки о значительном изменении цены
         
         Args:
             timestamp: Временная метка изменения
             price_before: Цена до изменения
             price_after: Цена после изменения
             percentage_change: Процентное изменение
+            
+        Returns:
+            Dict: Значения полей таблицы price_changes для пакетной вставки
         """
-        price_change = PriceChange(
-            timestamp=timestamp,
-            price_before=price_before,
-            price_after=price_after,
-            percentage_change=percentage_change
+        logger.info(
+            f"Обнаружено значительное изменение цены: {percentage_change:.2f}% "
+            f"в {timestamp.strftime('%Y-%m-%d')}"
         )
-        
-        try:
-            self.db_manager.session.add(price_change)
-            self.db_manager.session.commit()
-            logger.info(
-                f"Обнаружено значительное изменение цены: {percentage_change:.2f}% "
-                f"в {timestamp.strftime('%Y-%m-%d')}"
-            )
-        except Exception as e:
-            logger.error(f"Ошибка при сохранении изменения цены: {str(e)}")
-            self.db_manager.session.rollback()
\ No newline at end of file
+        return {
+            'timestamp': timestamp,
+            'price_before': price_before,
+            'price_after': price_after,
+            'percentage_change': percentage_change,
+            'volume': None
+        }
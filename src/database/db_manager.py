@@ -1,21 +1,61 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from loguru import logger
 
-from src.models.database import PriceChange, Event, EventPriceCorrelation
+from src.models.database import PriceChange, Event, EventPriceCorrelation, LatestSignificantChange
 from src.models.price_event import Event as EventModel, PriceEventCorrelation as PriceEventCorrelationModel
 
+# Размер пачки при потоковом чтении событий из БД
+EVENTS_FETCH_BATCH_SIZE = 1000
+# Количество ключей событий в одном запросе поиска дубликатов
+EVENT_KEYS_BATCH_SIZE = 500
+# id единственной строки таблицы latest_significant_change
+LATEST_CHANGE_ID = 1
+
+
+def _event_key(event) -> Tuple:
+    """Уникальный ключ события (совпадает для модели и ORM-объекта)"""
+    return (event.timestamp, event.event_type, event.source, event.description)
+
+
+def _event_row(event) -> Dict:
+    """Значения полей события для вставки в таблицу events"""
+    return {
+        'timestamp': event.timestamp,
+        'event_type': event.event_type,
+        'source': event.source,
+        'description': event.description,
+        'sentiment_score': event.sentiment_score
+    }
+
+
+def _insert_events_ignore_duplicates():
+    """INSERT в таблицу events, пропускающий строки с уже существующим уникальным ключом"""
+    return sqlite_insert(Event.__table__).on_conflict_do_nothing(
+        index_elements=['timestamp', 'event_type', 'source', 'description']
+    )
+
+
 class DatabaseManager:
     """Менеджер для работы с базой данных"""
     
     def __init__(self, session: Session):
         self.session = session
     
+    def _commit_or_flush(self, commit: bool) -> None:
+        """Коммит транзакции или только flush (выдача id) для пакетной записи с одним коммитом"""
+        if commit:
+            self.session.commit()
+        else:
+            self.session.flush()
+    
     def save_price_change(self, timestamp: datetime, price_before: float, 
                          price_after: float, percentage_change: float, 
-                         volume: Optional[float] = None) -> PriceChange:
-        """Сохранение изменения цены"""
+                         volume: Optional[float] = None, commit: bool = True) -> PriceChange:
+        """Сохранение изменения цены (commit=False - только flush, коммит делает вызывающий код)"""
         try:
             price_change = PriceChange(
                 timestamp=timestamp,
@@ -25,7 +65,10 @@ class DatabaseManager:
                 volume=volume
             )
             self.session.add(price_change)
-            self.session.commit()
+            # flush выдает id, чтобы в той же транзакции обновить ссылку на последнее изменение
+            self.session.flush()
+            self._update_latest_significant_change(price_change.id, timestamp)
+            self._commit_or_flush(commit)
             logger.info(f"Сохранено изменение цены: {percentage_change:+.2f}%")
             return price_change
         except Exception as e:
@@ -33,8 +76,8 @@ class DatabaseManager:
             logger.error(f"Ошибка при сохранении изменения цены: {str(e)}")
             raise
     
-    def save_event(self, event: EventModel) -> Event:
-        """Сохранение события"""
+    def save_event(self, event: EventModel, commit: bool = True) -> Event:
+        """Сохранение события (commit=False - только flush, коммит делает вызывающий код)"""
         try:
             db_event = Event(
                 timestamp=event.timestamp,
@@ -44,7 +87,7 @@ class DatabaseManager:
                 sentiment_score=event.sentiment_score
             )
             self.session.add(db_event)
-            self.session.commit()
+            self._commit_or_flush(commit)
             logger.info(f"Сохранено событие: {event.event_type} от {event.source}")
             return db_event
         except Exception as e:
@@ -52,9 +95,104 @@ class DatabaseManager:
             logger.error(f"Ошибка при сохранении события: {str(e)}")
             raise
     
+    def save_events_bulk(self, events: List[EventModel]) -> int:
+        """
+        Сохранение пачки событий в одной транзакции
+        
+        Уже существующие события (по уникальному ключу) пропускаются самой БД
+        через INSERT OR IGNORE, без предварительных SELECT. Запись идет через отдельное
+        Core-соединение в обход сессии ORM: вставленные объекты дальше не нужны, а сессия
+        не участвует, поэтому метод можно вызывать из потока записи.
+        
+        Args:
+            events: События для сохранения
+            
+        Returns:
+            int: Количество добавленных событий
+        """
+        if not events:
+            return 0
+        try:
+            with self.session.get_bind().begin() as connection:
+                result = connection.execute(
+                    _insert_events_ignore_duplicates(),
+                    [_event_row(event) for event in events]
+                )
+            logger.info(f"Сохранено событий: {result.rowcount} из {len(events)}")
+            return result.rowcount
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении событий: {str(e)}")
+            raise
+
+    def save_price_changes_bulk(self, rows: List[Dict]) -> int:
+        """
+        Сохранение пачки изменений цены в одной транзакции
+        
+        Строки пишутся через Core INSERT (executemany), минуя unit of work ORM: ORM-объекты
+        PriceChange не создаются. В той же транзакции обновляется ссылка на последнее
+        значительное изменение цены.
+        
+        Args:
+            rows: Значения полей изменений цены (timestamp, price_before, price_after,
+                  percentage_change, volume)
+            
+        Returns:
+            int: Количество сохраненных изменений цены
+        """
+        if not rows:
+            return 0
+        try:
+            # id новых строк возвращаются тем же INSERT (в порядке rows), повторный поиск не нужен
+            price_change_ids = self.session.scalars(
+                insert(PriceChange.__table__).returning(
+                    PriceChange.__table__.c.id, sort_by_parameter_order=True
+                ),
+                rows
+            ).all()
+            latest = max(range(len(rows)), key=lambda i: rows[i]['timestamp'])
+            self._update_latest_significant_change(price_change_ids[latest], rows[latest]['timestamp'])
+            self.session.commit()
+            logger.info(f"Сохранено изменений цены: {len(rows)}")
+            return len(rows)
+        except Exception as e:
+            self.session.rollback()
+            logger.error(f"Ошибка при сохранении изменений цены: {str(e)}")
+            raise
+    
+    def _update_latest_significant_change(self, price_change_id: int, timestamp: datetime) -> None:
+        """
+        Перевод ссылки на последнее изменение цены на новую запись, если она не старше текущей
+        
+        Вызывается при каждой вставке в price_changes в той же транзакции (без коммита).
+        
+        Args:
+            price_change_id: id добавленного изменения цены
+            timestamp: Временная метка добавленного изменения цены
+        """
+        state = self.session.get(LatestSignificantChange, LATEST_CHANGE_ID)
+        if state is None:
+            self.session.add(LatestSignificantChange(id=LATEST_CHANGE_ID, price_change_id=price_change_id))
+        else:
+            current_timestamp = self.session.scalar(
+                select(PriceChange.timestamp).where(PriceChange.id == state.price_change_id)
+            )
+            if current_timestamp is None or current_timestamp <= timestamp:
+                state.price_change_id = price_change_id
+        self.session.flush()
+    
+    def get_latest_significant_change(self) -> Optional[PriceChange]:
+        """Последнее значительное изменение цены: поиск по первичному ключу вместо сортировки таблицы"""
+        stmt = (
+            select(PriceChange)
+            .join(LatestSignificantChange, LatestSignificantChange.price_change_id == PriceChange.id)
+            .where(LatestSignificantChange.id == LATEST_CHANGE_ID)
+        )
+        return self.session.execute(stmt).scalar_one_or_none()
+    
     def save_correlation(self, correlation: PriceEventCorrelationModel, 
-                        db_event: Event, db_price_change: PriceChange) -> EventPriceCorrelation:
-        """Сохранение корреляции между событием и изменением цены"""
+                        db_event: Event, db_price_change: PriceChange,
+                        commit: bool = True) -> EventPriceCorrelation:
+        """Сохранение корреляции между событием и изменением цены (commit=False - только flush)"""
         try:
             db_correlation = EventPriceCorrelation(
                 event_id=db_event.id,
@@ -62,7 +200,7 @@ class DatabaseManager:
                 impact_score=correlation.impact_score
             )
             self.session.add(db_correlation)
-            self.session.commit()
+            self._commit_or_flush(commit)
             logger.info(f"Сохранена корреляция: impact={correlation.impact_score:.2f}")
             return db_correlation
         except Exception as e:
@@ -86,6 +224,25 @@ class DatabaseManager:
             description=event.description
         ).first()
 
+    def get_events_by_unique_keys(self, keys: List[Tuple]) -> Dict[Tuple, Event]:
+        """
+        Поиск событий по набору уникальных ключей (timestamp, event_type, source, description)
+        
+        Args:
+            keys: Уникальные ключи событий
+            
+        Returns:
+            Dict[Tuple, Event]: Найденные события по их ключам
+        """
+        found = {}
+        key_columns = tuple_(Event.timestamp, Event.event_type, Event.source, Event.description)
+        # Пачками, чтобы не упереться в лимит параметров SQLite
+        for i in range(0, len(keys), EVENT_KEYS_BATCH_SIZE):
+            batch = keys[i:i + EVENT_KEYS_BATCH_SIZE]
+            for db_event in self.session.scalars(select(Event).where(key_columns.in_(batch))):
+                found[_event_key(db_event)] = db_event
+        return found
+
     def get_correlation_by_unique(self, event_id: int, price_change_id: int) -> Optional[EventPriceCorrelation]:
         """Поиск корреляции по связке event_id + price_change_id"""
         return self.session.query(EventPriceCorrelation).filter_by(
@@ -108,18 +265,50 @@ class DatabaseManager:
                     price_before=price_change.price_before,
                     price_after=price_change.price_after,
                     percentage_change=price_change.percentage_change,
-                    volume=price_change.volume
+                    volume=price_change.volume,
+                    commit=False
                 )
 
+            # Уже сохраненные события находятся одним запросом по уникальным полям,
+            # недостающие добавляются пачкой с пропуском дубликатов и перечитываются ради id
+            event_keys = list(dict.fromkeys(_event_key(correlation.event) for correlation in correlations))
+            db_events = self.get_events_by_unique_keys(event_keys)
+            new_event_rows = {}
+            for correlation in correlations:
+                key = _event_key(correlation.event)
+                if key not in db_events:
+                    new_event_rows.setdefault(key, _event_row(correlation.event))
+            if new_event_rows:
+                self.session.execute(_insert_events_ignore_duplicates(), list(new_event_rows.values()))
+                db_events.update(self.get_events_by_unique_keys(list(new_event_rows)))
+
+            # Уже связанные с этим изменением цены события - тоже одним запросом
+            linked_event_ids = set(self.session.scalars(
+                select(EventPriceCorrelation.event_id)
+                .where(EventPriceCorrelation.price_change_id == db_price_change.id)
+            ))
+            correlation_rows = []
             for correlation in correlations:
-                # Проверяем, есть ли уже такое событие
-                db_event = self.get_event_by_unique(correlation.event)
-                if not db_event:
-                    db_event = self.save_event(correlation.event)
-                # Проверяем, есть ли уже такая корреляция
-                db_correlation = self.get_correlation_by_unique(db_event.id, db_price_change.id)
-                if not db_correlation:
-                    self.save_correlation(correlation, db_event, db_price_change)
+                db_event = db_events[_event_key(correlation.event)]
+                if db_event.id in linked_event_ids:
+                    continue
+                correlation_rows.append({
+                    'event_id': db_event.id,
+                    'price_change_id': db_price_change.id,
+                    'impact_score': correlation.impact_score
+                })
+                linked_event_ids.add(db_event.id)
+
+            # Корреляции вставляются многострочными INSERT ... RETURNING (id приходят в том же
+            # запросе), все изменения фиксируются одним коммитом
+            correlation_ids = []
+            if correlation_rows:
+                correlation_ids = self.session.scalars(
+                    insert(EventPriceCorrelation).returning(EventPriceCorrelation.id),
+                    correlation_rows
+                ).all()
+            self.session.commit()
+            logger.info(f"Сохранено новых событий: {len(new_event_rows)}, корреляций: {len(correlation_ids)}")
 
             logger.info("Все результаты анализа успешно сохранены (без дублирования)")
         except Exception as e:
@@ -139,10 +328,13 @@ class DatabaseManager:
             List[Event]: Список событий за указанный период
         """
         try:
-            events = self.session.query(Event).filter(
-                Event.timestamp >= start_time,
-                Event.timestamp <= end_time
-            ).order_by(Event.timestamp).all()
+            # Фильтр по индексу timestamp выполняется на стороне БД
+            stmt = (
+                select(Event)
+                .where(Event.timestamp.between(start_time, end_time))
+                .order_by(Event.timestamp)
+            )
+            events = self.session.scalars(stmt).all()
             
             logger.info(f"Получено {len(events)} событий из БД за период {start_time} - {end_time}")
             return events
@@ -158,9 +350,42 @@ class DatabaseManager:
             List[Event]: Список всех событий, отсортированных по времени
         """
         try:
-            events = self.session.query(Event).order_by(Event.timestamp).all()
+            stmt = select(Event).order_by(Event.timestamp)
+            events = self.session.scalars(stmt).all()
             logger.info(f"Получено {len(events)} событий из БД")
             return events
         except Exception as e:
             logger.error(f"Ошибка при получении всех событий из БД: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+
+    def get_event_columns(self, start_time: Optional[datetime] = None,
+                          end_time: Optional[datetime] = None) -> Dict[str, list]:
+        """
+        Получение полей событий по столбцам, без создания ORM-объектов
+        
+        Args:
+            start_time: Начальное время периода. Если None, без ограничения снизу
+            end_time: Конечное время периода. Если None, без ограничения сверху
+            
+        Returns:
+            Dict[str, list]: Значения каждого поля события, отсортированные по времени
+        """
+        fields = ('timestamp', 'event_type', 'source', 'description', 'sentiment_score')
+        try:
+            stmt = select(*(getattr(Event, field) for field in fields)).order_by(Event.timestamp)
+            if start_time is not None:
+                stmt = stmt.where(Event.timestamp >= start_time)
+            if end_time is not None:
+                stmt = stmt.where(Event.timestamp <= end_time)
+            # Строки читаются пачками и сразу раскладываются по столбцам: промежуточный
+            # список всех строк не создается (сами столбцы по-прежнему содержат весь результат)
+            columns = {field: [] for field in fields}
+            result = self.session.execute(stmt.execution_options(yield_per=EVENTS_FETCH_BATCH_SIZE))
+            for partition in result.partitions():
+                for field, values in zip(fields, zip(*partition)):
+                    columns[field].extend(values)
+            logger.info(f"Получено {len(columns['timestamp'])} событий из БД")
+            return columns
+        except Exception as e:
+            logger.error(f"Ошибка при получении событий из БД: {str(e)}")
+            return {field: [] for field in fields}
@@ -1,8 +1,10 @@
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
 import yaml
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 from loguru import logger
 
@@ -12,15 +14,59 @@ sys.path.append(str(project_root))
 
 from src.models.database import Base
 
-def load_config():
-    """Загрузка конфигурации из файла"""
-    config_path = project_root / 'config' / 'config.yaml'
+# Движок и фабрика сессий создаются один раз на процесс (см. get_engine, init_database)
+_engine = None
+_Session = None
+
+# Загрузчик на C (libyaml) заметно быстрее чистого Python, если PyYAML собран с ним
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+def load_config(config_path: Optional[Path] = None):
+    """
+    Загрузка конфигурации из файла
+    
+    Разобранная конфигурация кэшируется и перечитывается только при изменении файла
+    (ключ кэша - путь и время модификации).
+    
+    Args:
+        config_path: Путь к файлу конфигурации. По умолчанию config/config.yaml проекта
+    """
+    config_path = Path(config_path) if config_path else project_root / 'config' / 'config.yaml'
+    return _load_config_cached(str(config_path), os.stat(config_path).st_mtime_ns)
+
+@lru_cache(maxsize=8)
+def _load_config_cached(config_path: str, mtime_ns: int):
+    """Разбор файла конфигурации; mtime_ns входит в ключ кэша, чтобы изменения файла подхватывались"""
     with open(config_path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=_YamlLoader)
 
-def init_database():
-    """Инициализация базы данных - создание новой чистой базы"""
-    try:
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Настройка соединения SQLite для быстрой записи
+    
+    WAL-журнал с synchronous=NORMAL делает один fsync на checkpoint вместо двух на каждый
+    коммит и не блокирует читателей во время записи.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 МБ кэша страниц
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 МБ memory-mapped I/O
+    cursor.close()
+
+def get_engine():
+    """
+    Движок базы данных, создаваемый один раз на процесс
+    
+    Пул соединений переиспользуется всеми сессиями, поэтому повторные инициализации
+    не открывают соединения заново.
+    """
+    global _engine
+    if _engine is None:
         # Загружаем конфигурацию
         config = load_config()
         db_path = project_root / config['database']['path']
@@ -32,10 +78,21 @@ def init_database():
         database_url = f"sqlite:///{db_path}"
         
         # Создаем движок SQLAlchemy
-        engine = create_engine(
+        _engine = create_engine(
             database_url,
-            echo=False  # Отключаем вывод SQL-запросов
+            echo=False,  # Отключаем вывод SQL-запросов
+            pool_pre_ping=True,
+            pool_size=5,
+            max_overflow=10
         )
+        event.listen(_engine, "connect", _set_sqlite_pragmas)
+    return _engine
+
+def init_database():
+    """Инициализация базы данных - создание новой чистой базы"""
+    global _Session
+    try:
+        engine = get_engine()
         
         # Удаляем все существующие таблицы
         logger.info("Удаление существующих таблиц...")
@@ -47,10 +104,12 @@ def init_database():
         Base.metadata.create_all(engine)
         logger.info("Таблицы успешно созданы")
         
-        # Создаем фабрику сессий
-        Session = sessionmaker(bind=engine)
+        # Создаем фабрику сессий; поток записи новостей работает через соединение движка
+        # в обход сессии, поэтому привязка сессий к потокам (scoped_session) не нужна
+        if _Session is None:
+            _Session = sessionmaker(bind=engine)
         
-        return engine, Session
+        return engine, _Session
         
     except Exception as e:
         logger.error(f"Ошибка при инициализации базы данных: {str(e)}")
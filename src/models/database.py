@@ -1,5 +1,4 @@
-from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, Float, String, DateTime, ForeignKey, Text
+from sqlalchemy import create_engine, func, Column, Integer, Float, String, DateTime, ForeignKey, Text, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -8,9 +7,13 @@ Base = declarative_base()
 class PriceChange(Base):
     """Модель для хранения изменений цены биткоина"""
     __tablename__ = 'price_changes'
+    __table_args__ = (
+        # Покрывает поиск дубликатов (timestamp + percentage_change) и выборку по времени
+        Index('ix_pc_ts_pct', 'timestamp', 'percentage_change'),
+    )
 
     id = Column(Integer, primary_key=True)
-    timestamp = Column(DateTime, nullable=False, index=True)
+    timestamp = Column(DateTime, nullable=False)
     price_before = Column(Float, nullable=False)
     price_after = Column(Float, nullable=False)
     percentage_change = Column(Float, nullable=False)
@@ -26,6 +29,9 @@ class PriceChange(Base):
 class Event(Base):
     """Модель для хранения информации о событиях"""
     __tablename__ = 'events'
+    __table_args__ = (
+        UniqueConstraint('timestamp', 'event_type', 'source', 'description', name='uq_event'),
+    )
 
     id = Column(Integer, primary_key=True)
     timestamp = Column(DateTime, nullable=False, index=True)
@@ -49,11 +55,25 @@ class EventPriceCorrelation(Base):
     event_id = Column(Integer, ForeignKey('events.id'), nullable=False)
     price_change_id = Column(Integer, ForeignKey('price_changes.id'), nullable=False)
     impact_score = Column(Float, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Время записи проставляет сама БД (CURRENT_TIMESTAMP, UTC)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
 
     # Связи с другими таблицами
     event = relationship("Event", back_populates="correlations")
     price_change = relationship("PriceChange", back_populates="correlations")
 
     def __repr__(self):
-        return f"<EventPriceCorrelation(id={self.id}, impact={self.impact_score})>" 
\ No newline at end of file
+        return f"<EventPriceCorrelation(id={self.id}, impact={self.impact_score})>" 
+
+
+class LatestSignificantChange(Base):
+    """Последнее значительное изменение цены (единственная строка с id=1, обновляется при записи изменений)"""
+    __tablename__ = 'latest_significant_change'
+
+    id = Column(Integer, primary_key=True)
+    price_change_id = Column(Integer, ForeignKey('price_changes.id'), nullable=False)
+
+    price_change = relationship("PriceChange")
+
+    def __repr__(self):
+        return f"<LatestSignificantChange(price_change_id={self.price_change_id})>"
@@ -3,7 +3,9 @@ from datetime import datetime
 from typing import Optional
 from loguru import logger
 
-@dataclass
+__all__ = ['Event', 'PriceEventCorrelation']
+
+@dataclass(slots=True, frozen=True)
 class Event:
     """Модель для хранения информации о событии"""
     timestamp: datetime
@@ -12,16 +14,18 @@ class Event:
     description: str
     sentiment_score: Optional[float] = None
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PriceEventCorrelation:
     """Модель для хранения корреляции между событием и изменением цены"""
     event: Event
     impact_score: float
 
     def log_details(self) -> None:
-        """Логирование детальной информации о причине изменения цены"""
-        logger.info(f"\nСобытие: {self.event.description}")
-        logger.info(f"Тип: {self.event.event_type}")
-        logger.info(f"Источник: {self.event.source}")
-        logger.info(f"Время: {self.event.timestamp.strftime('%Y-%m-%d %H:%M')}")
-        logger.info(f"Влияние: {self.impact_score:.2f}") 
\ No newline at end of file
+        """Логирование детальной информации о причине изменения цены (одной записью)"""
+        logger.info("\n".join([
+            f"\nСобытие: {self.event.description}",
+            f"Тип: {self.event.event_type}",
+            f"Источник: {self.event.source}",
+            f"Время: {self.event.timestamp.strftime('%Y-%m-%d %H:%M')}",
+            f"Влияние: {self.impact_score:.2f}"
+        ])) 
\ No newline at end of file